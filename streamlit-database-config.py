@@ -1,32 +1,185 @@
 # File: database_config.py
+import logging
 import os
-from dotenv import load_dotenv
-import snowflake.connector
-import pandas as pd
+import queue
+import threading
+import time
+
+from lazy_imports import lazy_module
+
+logger = logging.getLogger(__name__)
+
+# Heavy dependencies are imported on first use rather than when the app loads
+pd = lazy_module('pandas')
+snowflake_connector = lazy_module('snowflake.connector')
+snowflake_errors = lazy_module('snowflake.connector.errors')
+
+# Snowflake error numbers for a session that no longer exists or has expired
+SESSION_GONE_ERRNOS = (390111, 390112, 390114)
+
+_environment_loaded = False
+_environment_lock = threading.Lock()
+
+# Idle connections kept open between queries
+_connection_pool = queue.LifoQueue()
+
+# Small lookup tables used to populate dropdowns, cached for REFERENCE_TTL_SECONDS
+REFERENCE_QUERIES = {
+    'templates': "SELECT template_id, template_name FROM templates",
+    'currency': "SELECT currency_id, currency_name FROM currency",
+    'epoch_type': "SELECT epoch_id, epoch_name FROM epoch_type",
+    'roles': "SELECT role_id, role_name FROM roles"
+}
+
+# One lock per table so a slow load only blocks lookups of that table
+_reference_cache = {}
+_reference_locks = {name: threading.Lock() for name in REFERENCE_QUERIES}
+
+
+def load_environment():
+    """
+    Load environment variables from .env, once per process
+    """
+    global _environment_loaded
+    with _environment_lock:
+        if not _environment_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _environment_loaded = True
 
-# Load environment variables
-load_dotenv()
 
 def get_snowflake_connection():
     """
     Establish a connection to Snowflake using environment variables
     """
-    conn = snowflake.connector.connect(
+    load_environment()
+    conn = snowflake_connector.connect(
         account=os.getenv('SNOWFLAKE_ACCOUNT'),
         user=os.getenv('SNOWFLAKE_USER'),
         password=os.getenv('SNOWFLAKE_PASSWORD'),
         warehouse=os.getenv('SNOWFLAKE_WAREHOUSE'),
         database=os.getenv('SNOWFLAKE_DATABASE'),
-        schema=os.getenv('SNOWFLAKE_SCHEMA')
+        schema=os.getenv('SNOWFLAKE_SCHEMA'),
+        client_session_keep_alive=True
     )
     return conn
 
+
+def get_pool_size():
+    load_environment()
+    return int(os.getenv('SNOWFLAKE_POOL_SIZE', '2'))
+
+
+def acquire_connection():
+    """
+    Take an open connection from the pool, or open a new one if none is idle
+    """
+    while True:
+        try:
+            conn = _connection_pool.get_nowait()
+        except queue.Empty:
+            return get_snowflake_connection()
+        if not conn.is_closed():
+            return conn
+
+
+def release_connection(conn):
+    """
+    Return a connection to the pool, closing it if the pool is already full
+    """
+    if conn.is_closed():
+        return
+    if _connection_pool.qsize() < get_pool_size():
+        _connection_pool.put(conn)
+    else:
+        conn.close()
+
+
+def warm_connection_pool():
+    """
+    Open connections until the pool is full
+    """
+    while _connection_pool.qsize() < get_pool_size():
+        _connection_pool.put(get_snowflake_connection())
+
+
+def close_quietly(conn):
+    """
+    Close a connection without letting a close failure hide the original error
+    """
+    try:
+        conn.close()
+    except Exception:
+        logger.warning('Error closing Snowflake connection', exc_info=True)
+
+
+def is_connection_error(error):
+    """
+    Whether an error (or one it was raised from) means the connection itself is unusable
+    """
+    connection_errors = (snowflake_errors.OperationalError, snowflake_errors.InterfaceError)
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, connection_errors):
+            return True
+        if getattr(error, 'errno', None) in SESSION_GONE_ERRNOS:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def run_query(query, conn):
+    """
+    Run a query on a connection, pooling it afterwards only if the query succeeded
+    """
+    try:
+        result = pd.read_sql(query, conn)
+    except Exception:
+        # Don't hand a connection in an unknown state to the next query
+        close_quietly(conn)
+        raise
+    release_connection(conn)
+    return result
+
+
 def execute_query(query):
     """
     Execute a SQL query and return results as a pandas DataFrame
     """
-    conn = get_snowflake_connection()
     try:
-        return pd.read_sql(query, conn)
-    finally:
-        conn.close()
+        return run_query(query, acquire_connection())
+    except Exception as e:
+        if not is_connection_error(e):
+            raise
+        # A pooled connection can be dropped server-side while it still looks
+        # open, so retry once on a fresh one
+        logger.warning('Retrying query on a new connection after: %s', type(e).__name__)
+        return run_query(query, get_snowflake_connection())
+
+
+def get_reference_ttl():
+    load_environment()
+    return float(os.getenv('REFERENCE_TTL_SECONDS', '300'))
+
+
+def get_reference_data(name):
+    """
+    Return a cached reference table, re-querying it once it is older than
+    the reference TTL
+    """
+    with _reference_locks[name]:
+        cached = _reference_cache.get(name)
+        if cached is None or time.monotonic() - cached[0] > get_reference_ttl():
+            result = execute_query(REFERENCE_QUERIES[name])
+            cached = (time.monotonic(), result)
+            _reference_cache[name] = cached
+        return cached[1].copy()
+
+
+def preload_reference_data():
+    """
+    Pre-fill the reference cache with every table
+    """
+    for name in REFERENCE_QUERIES:
+        get_reference_data(name)
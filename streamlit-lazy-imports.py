@@ -0,0 +1,82 @@
+# File: lazy_imports.py
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+# Startup timings, kept free of UI code so the database layer can record them
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def record_timing(name, seconds):
+    """
+    Store a startup timing (in seconds) under the given name
+    """
+    with _timings_lock:
+        _timings[name] = seconds
+
+
+def record_timing_once(name, seconds):
+    """
+    Store a timing only if none is recorded yet, so script reruns don't
+    overwrite the cold-start value
+    """
+    with _timings_lock:
+        _timings.setdefault(name, seconds)
+
+
+@contextmanager
+def timed(name):
+    """
+    Time the enclosed block and record it under the given name
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
+
+
+def get_timings():
+    with _timings_lock:
+        return dict(_timings)
+
+
+def format_timings():
+    return ', '.join(
+        f'{name}: {seconds * 1000:.0f} ms'
+        for name, seconds in sorted(get_timings().items())
+    )
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so heavy libraries are loaded by the page that needs them rather than
+    when the app is first loaded.
+    """
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with timed(f'import {self._module_name}'):
+                        self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._module_name!r} ({state})>'
+
+
+def lazy_module(module_name):
+    return LazyModule(module_name)
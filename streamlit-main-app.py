@@ -1,13 +1,23 @@
 # File: app.py
+import time
+_import_started = time.perf_counter()
+
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objs as go
+from lazy_imports import lazy_module, record_timing_once
+from startup import start_warmup, mark_first_render, render_startup_report
+
+# Plotting libraries are imported by the first page that draws a chart
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objs')
+
 from database_config import execute_query
 from project_management import (
     create_project_management_page, 
     add_project_management_to_main_app
 )
 
+record_timing_once('import app', time.perf_counter() - _import_started)
+
 # ... (keep existing functions from previous implementation)
 
 @add_project_management_to_main_app
@@ -20,6 +30,7 @@ def main():
         'Consultant Rates', 
         'Project Staffing', 
         'Currency Analysis',
+        'Profitability Cube',
         'Project Management'
     ])
     
@@ -31,8 +42,22 @@ def main():
         project_staffing()
     elif menu == 'Currency Analysis':
         currency_analysis()
+    elif menu == 'Profitability Cube':
+        # Imported on first open of this page unless the warm-up has already loaded it
+        from profitability_cube import create_profitability_page
+        create_profitability_page()
     elif menu == 'Project Management':
         create_project_management_page()
 
+def run_app():
+    # Start before page dispatch so every landing page triggers the warm-up
+    start_warmup()
+    
+    try:
+        main()
+    finally:
+        mark_first_render()
+        render_startup_report()
+
 if __name__ == '__main__':
-    main()
+    run_app()
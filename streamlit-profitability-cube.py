@@ -0,0 +1,436 @@
+# File: profitability_cube.py
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from database_config import execute_query
+from lazy_imports import lazy_module
+
+px = lazy_module('plotly.express')
+
+# Cube dimensions, in the order used for the default drill-down
+DIMENSIONS = [
+    'level_name',
+    'role_name',
+    'project_name',
+    'epoch_number',
+    'rate_year',
+    'currency_name'
+]
+
+DIMENSION_LABELS = {
+    'level_name': 'Consultant Level',
+    'role_name': 'Role',
+    'project_name': 'Project',
+    'epoch_number': 'Epoch',
+    'rate_year': 'Rate Year',
+    'currency_name': 'Currency'
+}
+
+# Additive measures stored per fact row
+MEASURES = [
+    'allocation',
+    'list_value_usd',
+    'cost_value_usd',
+    'margin_usd',
+    'list_value_local'
+]
+
+# Drill-down hierarchies offered on the dashboard page
+DRILL_PATHS = {
+    'Level > Role > Project > Epoch': ['level_name', 'role_name', 'project_name', 'epoch_number'],
+    'Project > Epoch > Role > Level': ['project_name', 'epoch_number', 'role_name', 'level_name'],
+    'Rate Year > Level > Role': ['rate_year', 'level_name', 'role_name'],
+    'Currency > Project > Role': ['currency_name', 'project_name', 'role_name']
+}
+
+# Member used for NULL dimension values so every row gets a valid code
+NULL_MEMBER = '(none)'
+
+# Staffing rows and the lookups they are priced from. Shared by the fact and
+# fingerprint queries so a refresh always compares the same rows it loads.
+# Rows without a matching rate card are kept with NULL measures and counted
+# as unpriced rather than silently dropped.
+FACT_SOURCE = """
+FROM projects_detail pd
+JOIN projects p ON pd.project_id = p.project_id
+LEFT JOIN roles r ON pd.role_id = r.role_id
+LEFT JOIN personnel pe ON pd.personnel_id = pe.personnel_id
+LEFT JOIN consultant_level cl ON pe.consultant_level_id = cl.consultant_level_id
+LEFT JOIN rate_card rc ON rc.consultant_level_id = pe.consultant_level_id
+    AND rc.rate_year = YEAR(p.created_at)
+LEFT JOIN currency c ON p.currency_id = c.currency_id
+"""
+
+
+def fact_filter(project_ids=None):
+    """
+    WHERE clause for the fact source, optionally limited to some projects
+    """
+    clause = "WHERE p.is_template = FALSE"
+    if project_ids:
+        ids = ', '.join(str(int(project_id)) for project_id in project_ids)
+        clause += f" AND pd.project_id IN ({ids})"
+    return clause
+
+
+def fact_query(project_ids=None):
+    """
+    Staffing rows priced against the rate card in effect for the project's year
+    """
+    return f"""
+    SELECT
+        pd.project_role_mapping_id,
+        pd.project_id,
+        cl.level_name,
+        r.role_name,
+        p.project_name,
+        pd.epoch_number,
+        rc.rate_year,
+        c.currency_name,
+        pd.epoch_percentage / 100 AS allocation,
+        rc.list_rate_usd * pd.epoch_percentage / 100 AS list_value_usd,
+        rc.cost_usd * pd.epoch_percentage / 100 AS cost_value_usd,
+        (rc.list_rate_usd - rc.cost_usd) * pd.epoch_percentage / 100 AS margin_usd,
+        rc.list_rate_usd * c.exchange_rate * pd.epoch_percentage / 100 AS list_value_local
+    {FACT_SOURCE}
+    {fact_filter(project_ids)}
+    """
+
+
+def fingerprint_query():
+    """
+    One cheap row per project, used to detect which projects changed since
+    the last load. Covers every column the fact rows are derived from,
+    including the rate card, currency and name lookups.
+    """
+    return f"""
+    SELECT
+        pd.project_id,
+        HASH_AGG(pd.project_role_mapping_id, pd.role_id, pd.personnel_id,
+                 pd.epoch_number, pd.epoch_percentage,
+                 p.project_name, p.currency_id, p.created_at,
+                 pe.consultant_level_id, cl.level_name, r.role_name,
+                 rc.rate_year, rc.list_rate_usd, rc.cost_usd,
+                 c.currency_name, c.exchange_rate) AS fingerprint
+    {FACT_SOURCE}
+    {fact_filter()}
+    GROUP BY pd.project_id
+    """
+
+
+# Rollups computed at build time. Drill-down queries are answered by slicing
+# the rollup for the drilled dimensions plus the one being shown.
+ROLLUPS = [(dim,) for dim in DIMENSIONS] + [
+    tuple(path[:depth])
+    for path in DRILL_PATHS.values()
+    for depth in range(2, len(path) + 1)
+]
+
+
+class ProfitabilityCube:
+    """
+    In-memory profitability cube over staffing, rate card and currency data.
+
+    Dimensions are dictionary encoded into integer code arrays and measures
+    are kept as float arrays, so slicing and grouping run as vectorised
+    numpy operations instead of warehouse queries.
+
+    The cube is shared across sessions, so all columnar state lives in one
+    dict that refresh() builds on the side and swaps in with a single
+    assignment; queries read that dict once and never see a partial build.
+    """
+
+    def __init__(self, facts_df, fingerprints_df=None):
+        self._refresh_lock = threading.Lock()
+        self._state = self._build(
+            facts_df.reset_index(drop=True),
+            self._fingerprint_map(fingerprints_df)
+        )
+
+    @classmethod
+    def load(cls):
+        """
+        Build the cube from a full read of the warehouse
+        """
+        return cls(execute_query(fact_query()), execute_query(fingerprint_query()))
+
+    @staticmethod
+    def _fingerprint_map(fingerprints_df):
+        if fingerprints_df is None or fingerprints_df.empty:
+            return {}
+        return dict(zip(fingerprints_df['project_id'], fingerprints_df['fingerprint']))
+
+    @classmethod
+    def _build(cls, facts, fingerprints):
+        # Columnar storage: integer codes plus label lookup per dimension
+        codes = {}
+        labels = {}
+        for dim in DIMENSIONS:
+            # Members are labelled as text so NULL can share their type;
+            # categories are sorted before formatting to keep numeric order
+            categorical = pd.Categorical(facts[dim])
+            dim_codes = categorical.codes.astype(np.int32)
+            dim_labels = [cls._format_member(member) for member in categorical.categories]
+            if (dim_codes < 0).any():
+                dim_codes[dim_codes < 0] = len(dim_labels)
+                dim_labels.append(NULL_MEMBER)
+            codes[dim] = dim_codes
+            labels[dim] = np.array(dim_labels, dtype=object)
+
+        measures = {
+            measure: facts[measure].to_numpy(dtype=np.float64, na_value=0.0)
+            for measure in MEASURES
+        }
+
+        state = {
+            'facts': facts,
+            'fingerprints': fingerprints,
+            'codes': codes,
+            'labels': labels,
+            'measures': measures,
+            'unpriced': int(facts['list_value_usd'].isna().sum())
+        }
+        all_one_currency = len(labels['currency_name']) == 1
+        state['rollups'] = {
+            group_by: cls._aggregate(
+                state, None, list(group_by),
+                'currency_name' in group_by or all_one_currency
+            )
+            for group_by in ROLLUPS
+        }
+        return state
+
+    @staticmethod
+    def _format_member(member):
+        # Integer columns come back as float when they contain NULLs
+        if isinstance(member, float) and member.is_integer():
+            return str(int(member))
+        return str(member)
+
+    def __len__(self):
+        return len(self._state['facts'])
+
+    @property
+    def unpriced_rows(self):
+        """
+        Number of staffing rows with no rate card for the project's year
+        """
+        return self._state['unpriced']
+
+    def members(self, dim):
+        """
+        Return the distinct values of a dimension
+        """
+        return self._state['labels'][dim].tolist()
+
+    def refresh(self):
+        """
+        Re-read only the projects whose staffing or pricing changed since the
+        last load. Returns the number of projects that were reloaded or dropped.
+        """
+        with self._refresh_lock:
+            state = self._state
+            fingerprints = self._fingerprint_map(execute_query(fingerprint_query()))
+
+            changed = [
+                project_id for project_id, fingerprint in fingerprints.items()
+                if state['fingerprints'].get(project_id) != fingerprint
+            ]
+            removed = [
+                project_id for project_id in state['fingerprints']
+                if project_id not in fingerprints
+            ]
+
+            if not changed and not removed:
+                return 0
+
+            facts = state['facts']
+            stale = facts['project_id'].isin(changed + removed)
+            frames = [facts[~stale]]
+
+            if changed:
+                frames.append(execute_query(fact_query(changed)))
+
+            self._state = self._build(pd.concat(frames, ignore_index=True), fingerprints)
+
+            return len(changed) + len(removed)
+
+    def query(self, group_by, filters=None):
+        """
+        Aggregate the measures by the given dimensions.
+
+        filters maps a dimension to the list of members to keep; dimensions
+        without a filter are not restricted. list_value_local is only
+        reported when the result rows are each in a single currency.
+        """
+        state = self._state
+        group_by = list(group_by)
+        filters = {dim: values for dim, values in (filters or {}).items() if values}
+
+        single_currency = (
+            'currency_name' in group_by
+            or len(filters.get('currency_name', [])) == 1
+            or len(state['labels']['currency_name']) == 1
+        )
+
+        rollup = self._find_rollup(state, group_by, filters)
+        if rollup is not None:
+            return self._slice_rollup(rollup, group_by, filters, single_currency)
+
+        return self._aggregate(state, self._mask(state, filters), group_by, single_currency)
+
+    @staticmethod
+    def _find_rollup(state, group_by, filters):
+        # A rollup can answer the query if it is grouped by exactly the
+        # filtered and grouped dimensions
+        if not group_by:
+            return None
+        dims = set(group_by) | set(filters)
+        for key, rollup in state['rollups'].items():
+            if len(key) == len(dims) and set(key) == dims:
+                return rollup
+        return None
+
+    @classmethod
+    def _slice_rollup(cls, rollup, group_by, filters, single_currency):
+        rows = rollup
+        for dim, values in filters.items():
+            rows = rows[rows[dim].isin(list(values))]
+
+        if rows.empty:
+            return pd.DataFrame(columns=group_by + MEASURES + ['margin_pct'])
+
+        if len(group_by) == len(rollup.columns) - len(MEASURES) - 1:
+            return rows.reset_index(drop=True)
+
+        result = rows.groupby(group_by, sort=False, as_index=False)[MEASURES].sum()
+        return cls._finish(result, single_currency)
+
+    @staticmethod
+    def _mask(state, filters):
+        if not filters:
+            return None
+
+        mask = np.ones(len(state['facts']), dtype=bool)
+        for dim, values in filters.items():
+            selected = np.flatnonzero(np.isin(state['labels'][dim], list(values)))
+            mask &= np.isin(state['codes'][dim], selected)
+        return mask
+
+    @classmethod
+    def _aggregate(cls, state, mask, group_by, single_currency):
+        codes = [state['codes'][dim] for dim in group_by]
+        measures = state['measures']
+
+        if mask is not None:
+            codes = [dim_codes[mask] for dim_codes in codes]
+            measures = {name: values[mask] for name, values in measures.items()}
+
+        if not group_by:
+            result = pd.DataFrame({name: [values.sum()] for name, values in measures.items()})
+            return cls._finish(result, single_currency)
+
+        if len(codes[0]) == 0:
+            return pd.DataFrame(columns=group_by + MEASURES + ['margin_pct'])
+
+        # Collapse the group-by codes into one key and sum each measure per key
+        shape = [len(state['labels'][dim]) for dim in group_by]
+        keys = np.ravel_multi_index(codes, shape)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+
+        result = {}
+        for dim, dim_codes in zip(group_by, np.unravel_index(unique_keys, shape)):
+            result[dim] = state['labels'][dim][dim_codes]
+        for name, values in measures.items():
+            result[name] = np.bincount(inverse, weights=values, minlength=len(unique_keys))
+
+        return cls._finish(pd.DataFrame(result), single_currency)
+
+    @staticmethod
+    def _finish(result, single_currency):
+        # Local amounts in different currencies cannot be added together
+        if not single_currency:
+            result['list_value_local'] = np.nan
+
+        list_value = result['list_value_usd'].replace(0, np.nan)
+        result['margin_pct'] = (result['margin_usd'] / list_value * 100).round(2)
+        return result
+
+
+@st.cache_resource
+def get_profitability_cube():
+    """
+    Build the cube once per server process and share it across sessions
+    """
+    return ProfitabilityCube.load()
+
+
+def create_profitability_page():
+    st.header('Profitability Cube')
+
+    cube = get_profitability_cube()
+
+    if st.button('Refresh Cube'):
+        started = time.perf_counter()
+        refreshed = cube.refresh()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.success(f'Reloaded {refreshed} project(s) in {elapsed_ms:.0f} ms')
+
+    # Slice and dice: restrict any dimension to a subset of its members
+    filters = {}
+    with st.expander('Filters'):
+        for dim in DIMENSIONS:
+            filters[dim] = st.multiselect(
+                DIMENSION_LABELS[dim],
+                cube.members(dim),
+                key=f'cube_filter_{dim}'
+            )
+
+    # Drill-down: each chosen member becomes a filter for the next level
+    path_name = st.selectbox('Drill-down Path', list(DRILL_PATHS.keys()))
+    path = DRILL_PATHS[path_name]
+
+    drill_filters = dict(filters)
+    level = 0
+    while level < len(path) - 1:
+        dim = path[level]
+        members = cube.query([dim], drill_filters)[dim].tolist()
+        selected = st.selectbox(
+            f'Drill into {DIMENSION_LABELS[dim]}',
+            ['(All)'] + members,
+            key=f'cube_drill_{path_name}_{level}'
+        )
+        if selected == '(All)':
+            break
+        drill_filters[dim] = [selected]
+        level += 1
+
+    group_dim = path[level]
+
+    started = time.perf_counter()
+    result_df = cube.query([group_dim], drill_filters)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    st.caption(f'Answered in {elapsed_ms:.1f} ms')
+
+    if cube.unpriced_rows:
+        st.warning(
+            f'{cube.unpriced_rows} staffing row(s) have no rate card for their '
+            f'project year and are shown under Rate Year {NULL_MEMBER} with zero value.'
+        )
+
+    if result_df.empty:
+        st.info('No staffing matches the current selection.')
+        return
+
+    # Margin vs list value at the current drill level
+    chart_df = result_df.astype({group_dim: str})
+    fig = px.bar(chart_df, x=group_dim, y=['list_value_usd', 'cost_value_usd', 'margin_usd'],
+                 barmode='group',
+                 title=f'Profitability by {DIMENSION_LABELS[group_dim]}')
+    st.plotly_chart(fig)
+
+    st.dataframe(result_df)
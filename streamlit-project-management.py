@@ -1,7 +1,6 @@
 # File: project_management.py
 import streamlit as st
-import pandas as pd
-from database_config import get_snowflake_connection, execute_query
+from database_config import get_snowflake_connection, execute_query, get_reference_data
 
 def create_project_management_page():
     st.header('Project Management')
@@ -25,26 +24,10 @@ def create_project_management_page():
 def create_new_project():
     st.subheader('Create New Project')
     
-    # Fetch templates
-    templates_query = """
-    SELECT template_id, template_name 
-    FROM templates
-    """
-    templates_df = execute_query(templates_query)
-    
-    # Fetch currencies
-    currencies_query = """
-    SELECT currency_id, currency_name 
-    FROM currency
-    """
-    currencies_df = execute_query(currencies_query)
-    
-    # Fetch epoch types
-    epoch_query = """
-    SELECT epoch_id, epoch_name 
-    FROM epoch_type
-    """
-    epoch_df = execute_query(epoch_query)
+    # Reference data is cached, and pre-loaded by the warm-up when the first session starts
+    templates_df = get_reference_data('templates')
+    currencies_df = get_reference_data('currency')
+    epoch_df = get_reference_data('epoch_type')
     
     # Project creation form
     with st.form('new_project_form'):
@@ -147,11 +130,7 @@ def assign_project_roles():
     personnel_df = execute_query(personnel_query)
     
     # Fetch roles
-    roles_query = """
-    SELECT role_id, role_name 
-    FROM roles
-    """
-    roles_df = execute_query(roles_query)
+    roles_df = get_reference_data('roles')
     
     # Role assignment form
     with st.form('role_assignment_form'):
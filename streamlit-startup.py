@@ -0,0 +1,95 @@
+# File: startup.py
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+from lazy_imports import format_timings, get_timings, record_timing_once, timed
+
+logger = logging.getLogger(__name__)
+
+# Reference point for time-to-first-render. Streamlit imports this module during
+# the first session's script run, so server boot and the streamlit import itself
+# happen before this and are not included.
+APP_LOADED = time.perf_counter()
+
+_warmup_status = {'state': 'not started'}
+
+
+def mark_first_render():
+    """
+    Record time from app load to first render, once per server process
+    """
+    record_timing_once('first render since app load', time.perf_counter() - APP_LOADED)
+
+
+def _warmup_enabled():
+    from database_config import load_environment
+
+    load_environment()
+    return os.getenv('STARTUP_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+
+
+def run_warmup():
+    """
+    Open pooled connections and pre-load reference and dimension data
+    """
+    from database_config import warm_connection_pool, preload_reference_data
+
+    _warmup_status['state'] = 'running'
+    try:
+        with timed('warm-up total'):
+            with timed('warm-up connections'):
+                warm_connection_pool()
+
+            with timed('warm-up reference data'):
+                preload_reference_data()
+
+            with timed('warm-up profitability cube'):
+                from profitability_cube import get_profitability_cube
+                get_profitability_cube()
+
+        _warmup_status['state'] = 'complete'
+        logger.info('Warm-up complete: %s', format_timings())
+
+    except Exception:
+        # Details stay in the server log; they can include account names
+        _warmup_status['state'] = 'failed'
+        logger.exception('Warm-up failed')
+
+
+@st.cache_resource
+def start_warmup():
+    """
+    Start the warm-up in a background thread, once per server process.
+    Streamlit has no boot hook, so this runs when the first session starts.
+    """
+    if not _warmup_enabled():
+        _warmup_status['state'] = 'disabled'
+        return None
+
+    thread = threading.Thread(target=run_warmup, name='pricing-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def _report_enabled():
+    from database_config import load_environment
+
+    load_environment()
+    return os.getenv('STARTUP_REPORT', 'false').lower() in ('1', 'true', 'yes')
+
+
+def render_startup_report():
+    """
+    Show warm-up state and startup timings in the sidebar, when enabled
+    """
+    if not _report_enabled():
+        return
+
+    with st.sidebar.expander('Startup Timings'):
+        st.write(f"Warm-up: {_warmup_status['state']}")
+
+        for name, seconds in sorted(get_timings().items()):
+            st.text(f'{name}: {seconds * 1000:.0f} ms')